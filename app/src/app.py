@@ -1,4 +1,4 @@
-"""Main Flask application.
+"""Main ASGI application.
 
 This module exposes a small demo service that fetches public GitHub profile
 metrics and serves a static frontend dashboard. The goal is to provide a
@@ -8,161 +8,609 @@ Key features implemented below:
 - /           -> serves the frontend dashboard (index.html)
 - /healthz    -> simple health endpoint
 - /api/profile/<username> -> aggregates public GitHub metrics for a username
+- /api/profiles (POST) -> same aggregates for a list of usernames at once
 
 Notes for DevOps:
+- Runs on FastAPI/Starlette and is served by Uvicorn. GitHub calls are pure
+  I/O, so they are awaited on the event loop instead of blocking a worker
+  thread per in-flight request. Start with `uvicorn app:app --workers N`.
 - Honors GITHUB_TOKEN env var for authenticated GitHub API requests to avoid
-  strict rate limits in CI or heavy usage.
-- Adds simple in-memory TTL cache to reduce repeated API calls on short times.
+  strict rate limits in CI or heavy usage. With a token the profile is read
+  through a single GraphQL query; without one it falls back to two REST calls.
+- Caches aggregates for a short TTL to reduce repeated API calls: in Redis
+  when REDIS_URL is set (shared by all workers/pods), otherwise in memory.
+  Expired entries are revalidated with ETags (If-None-Match -> 304).
 """
 
-from flask import Flask, jsonify, send_from_directory, request
+import asyncio
+import hashlib
+import heapq
 import os
-import requests
+import re
 import time
 from collections import Counter
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Tuple
+
+import aiohttp
+import orjson
+from cachetools import TTLCache
+import redis.asyncio as redis
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
 
 # Basic configuration
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
 GITHUB_API = "https://api.github.com"
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+REDIS_URL = os.getenv("REDIS_URL")
+# Max concurrent outbound GitHub calls per process, and the longest we are
+# willing to pause (seconds) for a rate-limit reset before failing the call.
+GITHUB_MAX_CONCURRENT = int(os.getenv("GITHUB_MAX_CONCURRENT", "8"))
+GITHUB_MAX_RATE_LIMIT_WAIT = float(os.getenv("GITHUB_MAX_RATE_LIMIT_WAIT", "30"))
+# Pre-open the GitHub connection on startup (set GITHUB_WARMUP=0 to disable).
+GITHUB_WARMUP = os.getenv("GITHUB_WARMUP", "1") != "0"
+# Upper bound on usernames accepted by the batch endpoint.
+MAX_BATCH_USERNAMES = 20
+# GitHub login format. Usernames are interpolated into API paths and cache
+# keys, so anything else (slashes, "..", query strings, newlines) is rejected
+# up front. Always check with fullmatch(): "$" would accept a trailing "\n".
+GITHUB_LOGIN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9-]{0,38}")
+
+
+# User and repo fields the aggregate actually reads; everything else is
+# dropped before aggregating or caching.
+USER_FIELDS = (
+    "login",
+    "name",
+    "bio",
+    "avatar_url",
+    "html_url",
+    "followers",
+    "following",
+    "public_repos",
+)
+REPO_FIELDS = (
+    "name",
+    "html_url",
+    "stargazers_count",
+    "forks_count",
+    "language",
+    "pushed_at",
+    "updated_at",
+)
+
+# Single GraphQL query returning the profile plus its newest 100 public repos
+# with exactly the fields consumed by the aggregation below. It goes through
+# `repositoryOwner` so organizations resolve too, like REST `/users/{login}`.
+PROFILE_QUERY = """
+query($login: String!) {
+  repositoryOwner(login: $login) {
+    login avatarUrl url
+    ... on User {
+      name bio
+      followers { totalCount }
+      following { totalCount }
+    }
+    ... on Organization { name description }
+    repositories(first: 100, privacy: PUBLIC, ownerAffiliations: OWNER,
+                 orderBy: {field: PUSHED_AT, direction: DESC}) {
+      totalCount
+      nodes {
+        name url stargazerCount forkCount
+        primaryLanguage { name }
+        pushedAt updatedAt
+      }
+    }
+  }
+}
+"""
 
-# Serve static files directly at the application root so the SPA can request
-# assets like `/style.css` and `/app.js` without a `/static` prefix. This
-# keeps the demo simple and friendly for Netlify/local setups.
-app = Flask(__name__, static_folder=STATIC_DIR, static_url_path='')
 
+def _rate_limit_wait(resp: aiohttp.ClientResponse) -> Optional[float]:
+    """Seconds until GitHub accepts requests again, or None if not limited.
 
-class SimpleTTLCache:
-    """A tiny thread-unsafe TTL cache for demo purposes.
+    GitHub signals limits with 429, or 403 plus `Retry-After` (secondary
+    limits) or `X-RateLimit-Remaining: 0` (primary limit, reset epoch in
+    `X-RateLimit-Reset`).
+    """
+    if resp.status not in (403, 429):
+        return None
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    if resp.headers.get("X-RateLimit-Remaining") == "0":
+        reset = resp.headers.get("X-RateLimit-Reset", "")
+        return max(0.0, int(reset) - time.time()) if reset.isdigit() else 0.0
+    return 0.0 if resp.status == 429 else None
+
+
+class GitHubAPIError(Exception):
+    """GitHub reported an error outside of the HTTP status (e.g. GraphQL)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# (value, when, sources) as stored by the profile caches below. `sources`
+# holds the slim upstream bodies the value was built from plus their ETags,
+# e.g. {"user": {"etag": ..., "body": {...}}, "repos": {...}}, or None.
+CacheEntry = Tuple[Any, float, Optional[Dict[str, Any]]]
 
-    Avoids adding dependencies while reducing GitHub API calls during demos.
-    For production use a proper cache (Redis, memcached) behind the app.
+
+class SimpleTTLCache:
+    """A small bounded in-process TTL cache.
+
+    Used when REDIS_URL is not set (local runs, tests). Each worker process
+    keeps its own copy, so prefer `RedisTTLCache` once the app is scaled out.
+
+    Entries are stored as `(value, when, sources)`. Expired entries are kept
+    for `stale_seconds` more so their ETags can be used to revalidate with
+    GitHub instead of downloading unchanged payloads. The backing
+    `cachetools.TTLCache` drops entries after that window and evicts
+    least-recently-used ones past `maxsize`, so random usernames cannot grow
+    memory without bound. No lock is needed: methods never await, so they
+    run atomically on the event loop thread.
     """
 
-    def __init__(self, ttl_seconds: int = 60):
+    def __init__(self, ttl_seconds: int = 60, stale_seconds: int = 600, maxsize: int = 10_000):
         self.ttl = ttl_seconds
-        self.store: Dict[str, Any] = {}
+        self.store: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl_seconds + stale_seconds)
 
-    def get(self, key: str) -> Optional[Any]:
+    async def get(self, key: str) -> Optional[Any]:
         entry = self.store.get(key)
         if not entry:
             return None
-        value, when = entry
+        value, when, _ = entry
+        if time.time() - when > self.ttl:
+            return None
+        return value
+
+    async def get_stale(self, key: str) -> Optional[CacheEntry]:
+        """Return the raw entry regardless of age (used for revalidation)."""
+        return self.store.get(key)
+
+    async def set(self, key: str, value: Any, sources: Optional[Dict[str, Any]] = None):
+        self.store[key] = (value, time.time(), sources)
+
+
+class RedisTTLCache:
+    """Shared TTL cache backed by Redis.
+
+    Every worker and pod reads the same entries, so a profile fetched once is
+    a hit fleet-wide. Redis drops keys on its own via EXPIRE after
+    `ttl + stale_seconds`; the extra window keeps expired entries (and their
+    ETags) around for revalidation while freshness is still judged on `ttl`.
+
+    The cache is never a hard dependency: Redis errors are treated as a miss
+    on reads and ignored on writes, so requests fall through to GitHub.
+    """
+
+    def __init__(self, client: redis.Redis, ttl_seconds: int = 60, stale_seconds: int = 600):
+        self.client = client
+        self.ttl = ttl_seconds
+        self.stale_seconds = stale_seconds
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self.get_stale(key)
+        if not entry:
+            return None
+        value, when, _ = entry
         if time.time() - when > self.ttl:
-            del self.store[key]
             return None
         return value
 
-    def set(self, key: str, value: Any):
-        self.store[key] = (value, time.time())
+    async def get_stale(self, key: str) -> Optional[CacheEntry]:
+        """Return the raw entry regardless of age (used for revalidation)."""
+        try:
+            raw = await self.client.get(key)
+        except redis.RedisError:
+            return None
+        if not raw:
+            return None
+        entry = orjson.loads(raw)
+        return entry["value"], entry["when"], entry["sources"]
+
+    async def set(self, key: str, value: Any, sources: Optional[Dict[str, Any]] = None):
+        payload = {"value": value, "when": time.time(), "sources": sources}
+        try:
+            await self.client.set(key, orjson.dumps(payload), ex=self.ttl + self.stale_seconds)
+        except redis.RedisError:
+            pass
 
 
-# Create a session and attach optional auth header for better rate limits.
-session = requests.Session()
-if GITHUB_TOKEN:
-    session.headers.update({"Authorization": f"token {GITHUB_TOKEN}"})
-session.headers.update({"User-Agent": "cloud-cicd-platform-demo"})
+# The aiohttp session and the GitHub semaphore are bound to the running event
+# loop, so they are created in the lifespan hook rather than at import time.
+session: Optional[aiohttp.ClientSession] = None
+github_semaphore: Optional[asyncio.Semaphore] = None
 
-cache = SimpleTTLCache(ttl_seconds=60)
 
+def _github_headers() -> Dict[str, str]:
+    # Attach optional auth header for better rate limits.
+    headers = {"User-Agent": "cloud-cicd-platform-demo"}
+    if GITHUB_TOKEN:
+        headers["Authorization"] = f"token {GITHUB_TOKEN}"
+    return headers
 
-@app.after_request
-def add_cors_and_cache_headers(response):
-    # Allow demo frontends to call the API from any origin (safe for demo).
-    response.headers.setdefault("Access-Control-Allow-Origin", "*")
-    response.headers.setdefault("Cache-Control", "no-store")
-    return response
 
+async def _warm_github_connection():
+    """Open a pooled connection to api.github.com ahead of the first user.
 
-@app.route("/")
-def index():
+    `/rate_limit` is cheap and does not count against the quota; the call
+    resolves DNS and completes the TCP + TLS handshake so a freshly started
+    pod does not make its first visitor pay for them. Failures are ignored.
+    """
+    try:
+        async with session.get(f"{GITHUB_API}/rate_limit", timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            await resp.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        pass
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global session, github_semaphore
+    github_semaphore = asyncio.Semaphore(GITHUB_MAX_CONCURRENT)
+    session = aiohttp.ClientSession(
+        headers=_github_headers(),
+        timeout=aiohttp.ClientTimeout(total=10),
+        # Keep TLS connections to api.github.com alive and pooled across
+        # requests so only the first call pays the TCP + TLS handshake.
+        # DNS answers are cached for 5 minutes instead of aiohttp's 10s default.
+        connector=aiohttp.TCPConnector(
+            limit=64, limit_per_host=64, keepalive_timeout=75, ttl_dns_cache=300
+        ),
+    )
+    # Warm up in the background so startup (and readiness) is not delayed.
+    warmup = asyncio.create_task(_warm_github_connection()) if GITHUB_WARMUP else None
+    try:
+        yield
+    finally:
+        if warmup:
+            warmup.cancel()
+        await session.close()
+        session = None
+        if isinstance(cache, RedisTTLCache):
+            await cache.client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+# Profile JSON (repeated keys, URL prefixes) and the SPA assets compress very
+# well; level 6 keeps most of the size win at a fraction of level 9's CPU.
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=6)
+
+# Share the cache across workers/pods through Redis when configured;
+# otherwise fall back to the per-process dict.
+if REDIS_URL:
+    cache = RedisTTLCache(redis.from_url(REDIS_URL), ttl_seconds=60)
+else:
+    cache = SimpleTTLCache(ttl_seconds=60)
+
+# Serialized /api/profile bodies as (bytes, etag, expires_at). Always
+# per-process: it only saves re-encoding, while the shared profile cache above
+# avoids refetching. No stale window: nothing revalidates these entries.
+response_cache = SimpleTTLCache(ttl_seconds=60, stale_seconds=0)
+
+
+def json_response(payload: Any, status_code: int = 200) -> Response:
+    """Serialize `payload` with orjson straight to bytes.
+
+    orjson is several times faster than the stdlib encoder for the nested
+    profile aggregate and skips the intermediate str -> bytes step.
+    """
+    # API payloads are live data; the header is set at construction time
+    # (no per-response middleware). CORS is handled by the ingress.
+    return Response(
+        orjson.dumps(payload),
+        status_code=status_code,
+        media_type="application/json",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+# index.html never changes during a deploy, so it is read once at import and
+# served from memory with a content hash as ETag (no stat/open per hit).
+with open(os.path.join(STATIC_DIR, "index.html"), "rb") as f:
+    INDEX_BYTES = f.read()
+INDEX_ETAG = f'"{hashlib.md5(INDEX_BYTES).hexdigest()}"'
+
+
+@app.get("/")
+async def index(request: Request):
     """Serve the static dashboard index file.
 
     The static folder contains a single-page app that consumes the API below.
     """
-    return send_from_directory(STATIC_DIR, "index.html")
+    headers = {"ETag": INDEX_ETAG, "Cache-Control": "public, max-age=60"}
+    if request.headers.get("If-None-Match") == INDEX_ETAG:
+        return Response(status_code=304, headers=headers)
+    return Response(INDEX_BYTES, media_type="text/html", headers=headers)
+
 
+@app.get("/healthz")
+async def healthz():
+    return json_response({"status": "ok"}, status_code=200)
 
-@app.route("/healthz")
-def healthz():
-    return jsonify({"status": "ok"}), 200
 
+async def _github_request(
+    method: str,
+    path: str,
+    params: Dict[str, Any] = None,
+    headers: Dict[str, str] = None,
+    json: Any = None,
+) -> Tuple[int, Optional[str], Any]:
+    """Send one GitHub API call and return `(status, etag, json_body)`.
 
-def _github_get(path: str, params: Dict[str, Any] = None) -> requests.Response:
-    """Helper for GitHub GET requests with basic error handling."""
+    `json_body` is None for `304 Not Modified`. Non-2xx/3xx responses raise
+    `aiohttp.ClientResponseError`.
+    """
     url = f"{GITHUB_API}{path}"
-    resp = session.get(url, params=params or {}, timeout=10)
-    resp.raise_for_status()
-    return resp
+    # Every outbound call goes through the semaphore so bursts of profile
+    # requests cannot fan out past GitHub's secondary rate limits.
+    async with github_semaphore:
+        for attempt in range(2):
+            async with session.request(method, url, params=params, headers=headers, json=json) as resp:
+                wait = _rate_limit_wait(resp)
+                if wait is None or attempt or wait > GITHUB_MAX_RATE_LIMIT_WAIT:
+                    resp.raise_for_status()
+                    if resp.status == 304:
+                        return resp.status, resp.headers.get("ETag"), None
+                    return resp.status, resp.headers.get("ETag"), await resp.json(loads=orjson.loads)
+            # Back off while still holding the semaphore so the whole process
+            # slows down until GitHub's window resets, then retry once.
+            await asyncio.sleep(wait)
+
+
+async def _github_get(
+    path: str, params: Dict[str, Any] = None, etag: Optional[str] = None
+) -> Tuple[Any, Optional[str], bool]:
+    """Helper for GitHub GET requests with basic error handling.
+
+    When `etag` is given the request is made conditional with
+    `If-None-Match`; GitHub then answers `304 Not Modified` with an empty
+    body if nothing changed. Returns `(json_body, etag, from_304)` where
+    `json_body` is None on a 304.
+    """
+    headers = {"If-None-Match": etag} if etag else None
+    status, new_etag, body = await _github_request("GET", path, params=params or {}, headers=headers)
+    if status == 304:
+        return None, etag, True
+    return body, new_etag, False
+
 
+async def _github_graphql(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a GitHub GraphQL query and return its `data` object.
 
-def aggregate_github_profile(username: str) -> Dict[str, Any]:
+    GraphQL reports most failures as `200 OK` with an `errors` list; those
+    are translated to `GitHubAPIError` with the closest HTTP status.
+    """
+    _, _, body = await _github_request("POST", "/graphql", json={"query": query, "variables": variables})
+    errors = body.get("errors")
+    if errors:
+        kind = errors[0].get("type")
+        status = {"NOT_FOUND": 404, "RATE_LIMITED": 429}.get(kind, 502)
+        raise GitHubAPIError(status, errors[0].get("message", "GraphQL error"))
+    return body["data"]
+
+
+async def _fetch_profile_graphql(username: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Fetch user and repos in a single GraphQL round trip.
+
+    The result is mapped onto the REST field names so the aggregation code
+    does not care which API produced it. Organizations have no GraphQL
+    follower counts and use their description as bio.
+    """
+    data = await _github_graphql(PROFILE_QUERY, {"login": username})
+    node = data.get("repositoryOwner")
+    if node is None:
+        raise GitHubAPIError(404, f"User {username} not found")
+    repositories = node["repositories"]
+    user = {
+        "login": node.get("login"),
+        "name": node.get("name"),
+        "bio": node.get("bio") or node.get("description"),
+        "avatar_url": node.get("avatarUrl"),
+        "html_url": node.get("url"),
+        "followers": (node.get("followers") or {}).get("totalCount", 0),
+        "following": (node.get("following") or {}).get("totalCount", 0),
+        "public_repos": repositories["totalCount"],
+    }
+    repos = [
+        {
+            "name": r.get("name"),
+            "html_url": r.get("url"),
+            "stargazers_count": r.get("stargazerCount", 0),
+            "forks_count": r.get("forkCount", 0),
+            "language": (r.get("primaryLanguage") or {}).get("name"),
+            "pushed_at": r.get("pushedAt"),
+            "updated_at": r.get("updatedAt"),
+        }
+        for r in repositories["nodes"]
+    ]
+    return user, repos
+
+
+# Bound once: aggregate_github_profile is the hot path.
+_utcnow = datetime.utcnow
+
+# Per-process single-flight map: cache key -> future of the in-flight fetch.
+# Only touched from the event loop thread, so no extra lock is required.
+_inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+
+def _parse_iso(value: Optional[str]) -> int:
+    """Turn a GitHub `YYYY-MM-DDTHH:MM:SSZ` timestamp into a sortable int.
+
+    Slicing the fixed-width fields is far cheaper than `datetime.strptime`
+    and the packed YYYYMMDDHHMMSS integer orders exactly like the datetime.
+    Missing or malformed values sort as the oldest possible timestamp.
+    """
+    if not value:
+        return 0
+    try:
+        return (
+            (int(value[0:4]) * 10000 + int(value[5:7]) * 100 + int(value[8:10])) * 1000000
+            + int(value[11:13]) * 10000
+            + int(value[14:16]) * 100
+            + int(value[17:19])
+        )
+    except (TypeError, ValueError):
+        return 0
+
+
+def _pack_datetime(dt: datetime) -> int:
+    """Pack a datetime into the same YYYYMMDDHHMMSS int as `_parse_iso`."""
+    return (dt.year * 10000 + dt.month * 100 + dt.day) * 1000000 + dt.hour * 10000 + dt.minute * 100 + dt.second
+
+
+async def aggregate_github_profile(username: str) -> Dict[str, Any]:
     """Collect public metrics for a GitHub username.
 
     This function intentionally favors a small number of API calls. It does
     not request commit lists for every repo to avoid rate limit exhaustion.
     Instead it uses repo metadata (pushed_at) to give activity signals.
+
+    Concurrent cache misses for the same username are coalesced: the first
+    caller fetches from GitHub and the others await that same result.
     """
 
     cache_key = f"profile:{username}"
-    cached = cache.get(cache_key)
+    cached = await cache.get(cache_key)
     if cached:
         return cached
 
-    # 1) Basic user info
-    user = _github_get(f"/users/{username}").json()
-
-    # 2) Repos (paginate max 100 first page) - good enough for demos
-    repos = _github_get(f"/users/{username}/repos", params={"per_page": 100}).json()
-
-    # Sort repos by most recently updated/pushed (newest first) so the UI
-    # shows recent work at the top. Use pushed_at when available, otherwise
-    # fall back to updated_at.
-    from datetime import datetime
-
-    def repo_time_key(r):
-        t = r.get("pushed_at") or r.get("updated_at")
+    while (pending := _inflight.get(cache_key)) is not None:
         try:
-            return datetime.strptime(t, "%Y-%m-%dT%H:%M:%SZ") if t else datetime.min
-        except Exception:
-            return datetime.min
+            # Shield so a disconnecting follower cannot cancel the shared fetch.
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                # This follower itself was cancelled.
+                raise
+            # The leader was cancelled (its client went away) while ours is
+            # still connected: loop and join or become the next leader.
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        result = await _fetch_github_profile(username, cache_key)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark as retrieved so asyncio does not warn when nobody was waiting.
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if _inflight.get(cache_key) is future:
+            del _inflight[cache_key]
+
+
+async def _fetch_github_profile(username: str, cache_key: str) -> Dict[str, Any]:
+    """Fetch, aggregate and cache a profile (single-flight body of the above)."""
+
+    if GITHUB_TOKEN:
+        # GraphQL requires auth but collapses both REST calls into one round
+        # trip. It has no ETags, so freshness relies on the TTL alone.
+        user, repos = await _fetch_profile_graphql(username)
+        result = _build_profile(user, repos)
+        await cache.set(cache_key, result)
+        return result
+
+    # On expiry, revalidate with the stored ETags instead of refetching blind.
+    stale = await cache.get_stale(cache_key)
+    sources = stale[2] if stale else None
+    old_user = sources["user"] if sources else {"etag": None, "body": None}
+    old_repos = sources["repos"] if sources else {"etag": None, "body": None}
+
+    # Basic user info and repos (max 100, first page - good enough for demos)
+    # are independent, so both requests are in flight at the same time.
+    (user, etag_user, user_304), (repos, etag_repos, repos_304) = await asyncio.gather(
+        _github_get(f"/users/{username}", etag=old_user["etag"]),
+        _github_get(f"/users/{username}/repos", params={"per_page": 100}, etag=old_repos["etag"]),
+    )
+
+    # Nothing changed upstream: rebuild from the stored slim bodies without
+    # downloading or decoding anything. Re-aggregating (rather than reusing
+    # the old value) keeps time-based fields like the 90-day count current.
+    if user_304 and repos_304:
+        result = _build_profile(old_user["body"], old_repos["body"])
+        await cache.set(cache_key, result, sources=sources)
+        return result
+
+    # Only one side changed: rebuild from the stored slim body of the other.
+    # Keep only the fields used below so the full objects (owner, license,
+    # permissions, dozens of URLs) can be freed right away.
+    user = old_user["body"] if user_304 else {k: user[k] for k in USER_FIELDS if k in user}
+    if repos_304:
+        repos = old_repos["body"]
+    else:
+        repos = [{k: r[k] for k in REPO_FIELDS if k in r} for r in repos]
+
+    result = _build_profile(user, repos)
+    await cache.set(
+        cache_key,
+        result,
+        sources={
+            "user": {"etag": etag_user, "body": user},
+            "repos": {"etag": etag_repos, "body": repos},
+        },
+    )
+    return result
 
-    repos = sorted(repos, key=repo_time_key, reverse=True)
 
-    # Compute aggregates
-    total_stars = sum(r.get("stargazers_count", 0) for r in repos)
-    total_forks = sum(r.get("forks_count", 0) for r in repos)
+def _build_profile(user: Dict[str, Any], repos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate slim user/repo dicts (REST field names) into the API shape.
+
+    The inputs are not mutated: they may be the bodies kept in the cache.
+    """
+    # Recent activity window: repos pushed in the last 90 days.
+    now = _utcnow()
+    recent_cutoff = _pack_datetime(now - timedelta(days=90))
+
+    # Single pass over the repos: parse each timestamp exactly once and fold
+    # every aggregate in while the dict is hot, instead of one pass per metric.
+    total_stars = 0
+    total_forks = 0
+    recent_updates = 0
+    raw_languages = Counter()
+    stamped = []
+    for r in repos:
+        ts = _parse_iso(r.get("pushed_at") or r.get("updated_at"))
+        if ts > recent_cutoff:
+            recent_updates += 1
+        total_stars += r.get("stargazers_count", 0)
+        total_forks += r.get("forks_count", 0)
+        raw_languages[r.get("language")] += 1
+        stamped.append((ts, r))
     repo_count = len(repos)
 
-    # Language distribution and top repos
+    # Normalize language labels once per distinct value (a few dozen at most)
+    # rather than once per repo; blanks and missing values become 'Unknown'.
     languages = Counter()
-    top_repos = sorted(repos, key=lambda r: r.get("stargazers_count", 0), reverse=True)[:6]
-    for r in repos:
-        lang = r.get("language") or "Unknown"
-        # Normalize language labels (e.g. uppercase HCL is shown as 'HCL')
+    for lang, count in raw_languages.items():
         if isinstance(lang, str):
-            lang = lang.strip() or "Unknown"
-        languages[lang] += 1
+            lang = lang.strip()
+        languages[lang or "Unknown"] += count
+
+    # Sort repos by most recently updated/pushed (newest first) so the UI
+    # shows recent work at the top. Use pushed_at when available, otherwise
+    # fall back to updated_at. This also makes recency the tie-breaker below.
+    stamped.sort(key=itemgetter(0), reverse=True)
 
-    # Recent activity: count repos pushed in last 90 days
-    from datetime import datetime, timedelta
+    # Top repos by stars: a bounded heap selects 6 without sorting them all.
+    top_repos = heapq.nlargest(6, (r for _, r in stamped), key=lambda r: r.get("stargazers_count", 0))
 
-    now = datetime.utcnow()
-    recent_cutoff = now - timedelta(days=90)
-    recent_updates = 0
-    for r in repos:
-        pushed = r.get("pushed_at")
-        if pushed:
-            try:
-                pushed_dt = datetime.strptime(pushed, "%Y-%m-%dT%H:%M:%SZ")
-                if pushed_dt > recent_cutoff:
-                    recent_updates += 1
-            except Exception:
-                # Ignore parsing errors for robustness in demo
-                pass
-
-    result = {
+    return {
         "username": user.get("login"),
         "name": user.get("name"),
         "bio": user.get("bio"),
@@ -190,32 +638,103 @@ def aggregate_github_profile(username: str) -> Dict[str, Any]:
         "fetched_at": time.time(),
     }
 
-    cache.set(cache_key, result)
-    return result
-
 
-@app.route("/api/profile/<username>")
-def api_profile(username):
+@app.get("/api/profile/{username}")
+async def api_profile(username: str, request: Request):
     """Public API endpoint returning aggregated GitHub metrics for a username.
 
     Returns JSON with basic profile info, aggregates, and small arrays for
     list-like metrics. Errors are translated to user-friendly JSON responses.
+
+    Successful bodies are cached already serialized, so a hot profile is
+    served as stored bytes, and clients holding its ETag get a 304.
+    """
+    if not GITHUB_LOGIN_RE.fullmatch(username):
+        return json_response({"ok": False, "error": "Invalid GitHub username"}, status_code=400)
+    cache_key = f"profile:{username}"
+    cached = await response_cache.get(cache_key)
+    if cached is None or cached[2] <= time.time():
+        try:
+            data = await aggregate_github_profile(username)
+        except (aiohttp.ClientResponseError, GitHubAPIError) as e:
+            status = e.status or 500
+            # GitHub returns 404 for missing users
+            return json_response(
+                {"ok": False, "error": "GitHub API error", "status": status},
+                status_code=status,
+            )
+        except Exception as e:
+            # Generic fallback for robustness in demos
+            return json_response({"ok": False, "error": str(e)}, status_code=500)
+        body = orjson.dumps({"ok": True, "profile": data})
+        # The body must not outlive the aggregate it was built from, which
+        # may already be part-way through its TTL (e.g. shared via Redis).
+        expires_at = data["fetched_at"] + cache.ttl
+        cached = (body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', expires_at)
+        await response_cache.set(cache_key, cached)
+
+    body, etag, _ = cached
+    # no-cache (not no-store) lets browsers keep the body and revalidate it.
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.post("/api/profiles")
+async def api_profiles(request: Request):
+    """Batch endpoint: aggregate several usernames in one round trip.
+
+    Expects `{"usernames": [...]}` (at most MAX_BATCH_USERNAMES). Profiles
+    are fetched concurrently (still bounded by the GitHub semaphore and served
+    from cache when possible). Failed lookups are reported per username under
+    `errors` instead of failing the whole batch.
     """
     try:
-        data = aggregate_github_profile(username)
-        return jsonify({"ok": True, "profile": data}), 200
-    except requests.HTTPError as e:
-        status = getattr(e.response, "status_code", 500)
-        # GitHub returns 404 for missing users
-        return (
-            jsonify({"ok": False, "error": "GitHub API error", "status": status}),
-            status,
+        usernames = orjson.loads(await request.body()).get("usernames")
+    except (orjson.JSONDecodeError, AttributeError):
+        usernames = None
+    if not isinstance(usernames, list):
+        return json_response({"ok": False, "error": "Body must be {\"usernames\": [..]}"}, status_code=400)
+    # Cap the raw list before scanning it, so an oversized body is rejected
+    # without validating or deduplicating every entry.
+    if len(usernames) > MAX_BATCH_USERNAMES:
+        return json_response(
+            {"ok": False, "error": f"At most {MAX_BATCH_USERNAMES} usernames per request"},
+            status_code=400,
         )
-    except Exception as e:
-        # Generic fallback for robustness in demos
-        return jsonify({"ok": False, "error": str(e)}), 500
+    if not all(isinstance(u, str) and u for u in usernames):
+        return json_response({"ok": False, "error": "Body must be {\"usernames\": [..]}"}, status_code=400)
+    invalid = [u for u in usernames if not GITHUB_LOGIN_RE.fullmatch(u)]
+    if invalid:
+        return json_response({"ok": False, "error": "Invalid GitHub username", "usernames": invalid}, status_code=400)
+    usernames = list(dict.fromkeys(usernames))
+
+    results = await asyncio.gather(
+        *(aggregate_github_profile(u) for u in usernames), return_exceptions=True
+    )
+    profiles: Dict[str, Any] = {}
+    errors: Dict[str, int] = {}
+    for username, result in zip(usernames, results):
+        if isinstance(result, (aiohttp.ClientResponseError, GitHubAPIError)):
+            errors[username] = result.status or 500
+        elif isinstance(result, BaseException):
+            # Includes CancelledError, which is not an Exception subclass.
+            errors[username] = 500
+        else:
+            profiles[username] = result
+    return json_response({"ok": True, "profiles": profiles, "errors": errors}, status_code=200)
+
+
+# Serve static files directly at the application root so the SPA can request
+# assets like `/style.css` and `/app.js` without a `/static` prefix. This
+# keeps the demo simple and friendly for Netlify/local setups. Mounted last so
+# the API routes above take precedence.
+app.mount("/", StaticFiles(directory=STATIC_DIR), name="static")
 
 
 if __name__ == "__main__":
-    # Do not enable debug mode here; the Dockerfile runs the module directly.
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")), debug=False)
\ No newline at end of file
+    # Local convenience entrypoint; containers run uvicorn directly.
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
@@ -1,6 +1,8 @@
+import asyncio
 import json
 import os
 import sys
+import time
 import pytest
 
 # Ensure app/src is on sys.path so tests can import the application module
@@ -10,24 +12,476 @@ if SRC_PATH not in sys.path:
     sys.path.insert(0, SRC_PATH)
 
 import importlib
+from fastapi.testclient import TestClient
 application = importlib.import_module('app')
 
 
 @pytest.fixture
-def client():
-    application.app.config.update({"TESTING": True})
-    with application.app.test_client() as c:
+def client(monkeypatch):
+    # Keep tests offline: no warm-up call to api.github.com on startup
+    monkeypatch.setattr(application, 'GITHUB_WARMUP', False)
+    # Entering the context runs the lifespan hook (aiohttp session setup)
+    with TestClient(application.app) as c:
         yield c
 
 
 def test_healthz(client):
     r = client.get('/healthz')
     assert r.status_code == 200
-    data = r.get_json()
+    data = r.json()
     assert data.get('status') == 'ok'
 
 
 def test_root_serves_index(client):
     r = client.get('/')
     assert r.status_code == 200
-    assert b'GitHub Profile Metrics' in r.data
+    assert b'GitHub Profile Metrics' in r.content
+
+
+def test_parse_iso_orders_like_datetime():
+    older = application._parse_iso('2023-12-31T23:59:59Z')
+    newer = application._parse_iso('2024-01-01T00:00:00Z')
+    assert older < newer
+    assert application._parse_iso(None) == 0
+    assert application._parse_iso('not-a-date') == 0
+
+
+def test_expired_profile_is_revalidated_with_etags(monkeypatch):
+    calls = []
+
+    async def fake_github_get(path, params=None, etag=None):
+        calls.append((path, etag))
+        if etag:
+            return None, etag, True
+        if path.endswith('/repos'):
+            return [{'name': 'demo', 'pushed_at': '2024-01-01T00:00:00Z'}], 'W/"repos"', False
+        return {'login': 'octocat'}, 'W/"user"', False
+
+    monkeypatch.setattr(application, '_github_get', fake_github_get)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache(ttl_seconds=-1))
+
+    first = asyncio.run(application.aggregate_github_profile('octocat'))
+    second = asyncio.run(application.aggregate_github_profile('octocat'))
+
+    # Same aggregate, only the freshness timestamp moves
+    assert {**second, 'fetched_at': None} == {**first, 'fetched_at': None}
+    assert second['fetched_at'] >= first['fetched_at']
+    assert ('/users/octocat', 'W/"user"') in calls
+    assert ('/users/octocat/repos', 'W/"repos"') in calls
+
+
+def test_partial_revalidation_reuses_stored_body(monkeypatch):
+    calls = []
+    followers = iter([1, 2])
+
+    async def fake_github_get(path, params=None, etag=None):
+        calls.append((path, etag))
+        if path.endswith('/repos'):
+            if etag:
+                return None, etag, True
+            return [{'name': 'demo', 'stargazers_count': 4, 'owner': {}}], 'W/"repos"', False
+        # The user object changes on every call (e.g. follower count)
+        return {'login': 'octocat', 'followers': next(followers)}, None, False
+
+    monkeypatch.setattr(application, '_github_get', fake_github_get)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache(ttl_seconds=-1))
+
+    first = asyncio.run(application.aggregate_github_profile('octocat'))
+    second = asyncio.run(application.aggregate_github_profile('octocat'))
+
+    # Two round trips per fetch: no extra unconditional refetch of the repos
+    assert len(calls) == 4
+    assert calls[3] == ('/users/octocat/repos', 'W/"repos"')
+    assert (first['followers'], second['followers']) == (1, 2)
+    assert second['total_stars'] == 4
+    assert second['top_repos'][0]['name'] == 'demo'
+
+
+def test_unchanged_profile_recomputes_time_based_fields(monkeypatch):
+    from datetime import datetime
+
+    async def fake_github_get(path, params=None, etag=None):
+        if etag:
+            return None, etag, True
+        if path.endswith('/repos'):
+            return [{'name': 'demo', 'pushed_at': '2024-01-01T00:00:00Z'}], 'W/"repos"', False
+        return {'login': 'octocat'}, 'W/"user"', False
+
+    monkeypatch.setattr(application, '_github_get', fake_github_get)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache(ttl_seconds=-1))
+
+    monkeypatch.setattr(application, '_utcnow', lambda: datetime(2024, 2, 1))
+    first = asyncio.run(application.aggregate_github_profile('octocat'))
+    monkeypatch.setattr(application, '_utcnow', lambda: datetime(2025, 6, 1))
+    second = asyncio.run(application.aggregate_github_profile('octocat'))
+
+    assert first['recent_repo_updates_90d'] == 1
+    assert second['recent_repo_updates_90d'] == 0
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key, (None, None))[0]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, ex)
+
+
+def test_redis_cache_roundtrip_and_expiry_window():
+    client = FakeRedis()
+    cache = application.RedisTTLCache(client, ttl_seconds=60, stale_seconds=600)
+
+    sources = {'user': {'etag': 'u', 'body': {'login': 'octocat'}}, 'repos': {'etag': 'r', 'body': []}}
+    asyncio.run(cache.set('profile:octocat', {'username': 'octocat'}, sources=sources))
+
+    assert asyncio.run(cache.get('profile:octocat')) == {'username': 'octocat'}
+    assert asyncio.run(cache.get_stale('profile:octocat'))[2] == sources
+    assert client.data['profile:octocat'][1] == 660
+
+
+def test_concurrent_misses_share_one_github_fetch(monkeypatch):
+    calls = []
+
+    async def fake_github_get(path, params=None, etag=None):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        if path.endswith('/repos'):
+            return [], None, False
+        return {'login': 'torvalds'}, None, False
+
+    monkeypatch.setattr(application, '_github_get', fake_github_get)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache())
+
+    async def burst():
+        return await asyncio.gather(*[application.aggregate_github_profile('torvalds') for _ in range(10)])
+
+    results = asyncio.run(burst())
+
+    assert len(calls) == 2
+    assert all(r is results[0] for r in results)
+    assert application._inflight == {}
+
+
+def test_rate_limit_wait_reads_github_headers():
+    from types import SimpleNamespace
+
+    def resp(status, **headers):
+        return SimpleNamespace(status=status, headers=headers)
+
+    assert application._rate_limit_wait(resp(200)) is None
+    assert application._rate_limit_wait(resp(404)) is None
+    assert application._rate_limit_wait(resp(403)) is None
+    assert application._rate_limit_wait(resp(403, **{'Retry-After': '7'})) == 7.0
+    assert application._rate_limit_wait(resp(403, **{'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '0'})) == 0.0
+    assert application._rate_limit_wait(resp(429)) == 0.0
+
+
+def test_aggregate_profile_metrics(monkeypatch):
+    repos = [
+        {'name': 'old', 'stargazers_count': 5, 'forks_count': 1, 'language': 'Python',
+         'pushed_at': '2015-01-01T00:00:00Z'},
+        {'name': 'new', 'stargazers_count': 5, 'forks_count': 2, 'language': ' HCL ',
+         'pushed_at': '2099-01-01T00:00:00Z'},
+        {'name': 'popular', 'stargazers_count': 40, 'forks_count': 0, 'language': None,
+         'pushed_at': None, 'updated_at': '2016-01-01T00:00:00Z'},
+    ]
+
+    async def fake_github_get(path, params=None, etag=None):
+        if path.endswith('/repos'):
+            return [dict(r) for r in repos], None, False
+        return {'login': 'octocat', 'public_repos': 3}, None, False
+
+    monkeypatch.setattr(application, '_github_get', fake_github_get)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache())
+
+    profile = asyncio.run(application.aggregate_github_profile('octocat'))
+
+    assert profile['total_stars'] == 50
+    assert profile['total_forks'] == 3
+    assert profile['repo_count'] == 3
+    assert profile['recent_repo_updates_90d'] == 1
+    assert profile['languages'] == {'Python': 1, 'HCL': 1, 'Unknown': 1}
+    # Star ties are broken by recency (newest first)
+    assert [r['name'] for r in profile['top_repos']] == ['popular', 'new', 'old']
+
+
+def test_graphql_profile_is_mapped_to_rest_shape(monkeypatch):
+    async def fake_graphql(query, variables):
+        assert variables == {'login': 'octocat'}
+        return {'repositoryOwner': {
+            'login': 'octocat', 'name': 'The Octocat', 'bio': None,
+            'avatarUrl': 'https://example.com/a.png', 'url': 'https://github.com/octocat',
+            'followers': {'totalCount': 10}, 'following': {'totalCount': 2},
+            'repositories': {'totalCount': 1, 'nodes': [{
+                'name': 'hello', 'url': 'https://github.com/octocat/hello',
+                'stargazerCount': 3, 'forkCount': 1, 'primaryLanguage': {'name': 'Go'},
+                'pushedAt': '2024-01-01T00:00:00Z', 'updatedAt': '2024-01-01T00:00:00Z',
+            }]},
+        }}
+
+    monkeypatch.setattr(application, 'GITHUB_TOKEN', 'token')
+    monkeypatch.setattr(application, '_github_graphql', fake_graphql)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache())
+
+    profile = asyncio.run(application.aggregate_github_profile('octocat'))
+
+    assert profile['followers'] == 10
+    assert profile['public_repos'] == 1
+    assert profile['languages'] == {'Go': 1}
+    assert profile['top_repos'][0]['html_url'] == 'https://github.com/octocat/hello'
+
+
+def test_pack_datetime_matches_parse_iso():
+    from datetime import datetime
+
+    dt = datetime(2024, 3, 5, 10, 20, 30)
+    assert application._pack_datetime(dt) == application._parse_iso('2024-03-05T10:20:30Z')
+
+
+def test_root_honors_if_none_match(client):
+    etag = client.get('/').headers['etag']
+    r = client.get('/', headers={'If-None-Match': etag})
+    assert r.status_code == 304
+    assert r.content == b''
+
+
+def test_responses_are_gzip_compressed(client):
+    r = client.get('/app.js', headers={'Accept-Encoding': 'gzip'})
+    assert r.status_code == 200
+    assert r.headers.get('content-encoding') == 'gzip'
+
+
+def test_batch_profiles_reports_per_user_errors(client, monkeypatch):
+    async def fake_aggregate(username):
+        if username == 'ghost':
+            raise application.GitHubAPIError(404, 'not found')
+        return {'username': username}
+
+    monkeypatch.setattr(application, 'aggregate_github_profile', fake_aggregate)
+
+    r = client.post('/api/profiles', json={'usernames': ['octocat', 'ghost', 'octocat']})
+    assert r.status_code == 200
+    data = r.json()
+    assert data['profiles'] == {'octocat': {'username': 'octocat'}}
+    assert data['errors'] == {'ghost': 404}
+
+    assert client.post('/api/profiles', json={'usernames': 'octocat'}).status_code == 400
+    assert client.post('/api/profiles', json={'usernames': [f'u{i}' for i in range(21)]}).status_code == 400
+    r = client.post('/api/profiles', json={'usernames': ['../x'] * 10000})
+    assert r.status_code == 400
+    assert r.json()['error'] == 'At most 20 usernames per request'
+
+
+def test_profile_body_is_cached_with_etag(client, monkeypatch):
+    calls = []
+
+    async def fake_aggregate(username):
+        calls.append(username)
+        return {'username': username, 'fetched_at': time.time()}
+
+    monkeypatch.setattr(application, 'aggregate_github_profile', fake_aggregate)
+    monkeypatch.setattr(application, 'response_cache', application.SimpleTTLCache())
+
+    first = client.get('/api/profile/octocat')
+    assert first.status_code == 200
+    assert first.json()['profile']['username'] == 'octocat'
+
+    second = client.get('/api/profile/octocat', headers={'If-None-Match': first.headers['etag']})
+    assert second.status_code == 304
+    assert calls == ['octocat']
+
+
+def test_profile_not_found_is_reported(client, monkeypatch):
+    async def fake_aggregate(username):
+        raise application.GitHubAPIError(404, 'not found')
+
+    monkeypatch.setattr(application, 'aggregate_github_profile', fake_aggregate)
+    monkeypatch.setattr(application, 'response_cache', application.SimpleTTLCache())
+
+    r = client.get('/api/profile/ghost')
+    assert r.status_code == 404
+    assert r.json() == {'ok': False, 'error': 'GitHub API error', 'status': 404}
+
+
+def test_simple_cache_is_bounded():
+    cache = application.SimpleTTLCache(maxsize=2)
+
+    async def fill():
+        for name in ('a', 'b', 'c'):
+            await cache.set(f'profile:{name}', name)
+
+    asyncio.run(fill())
+
+    assert len(cache.store) == 2
+    assert asyncio.run(cache.get('profile:a')) is None
+    assert asyncio.run(cache.get('profile:c')) == 'c'
+
+
+def test_api_profile_against_mocked_github(client, monkeypatch):
+    from aioresponses import aioresponses
+
+    monkeypatch.setattr(application, 'GITHUB_TOKEN', None)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache())
+    monkeypatch.setattr(application, 'response_cache', application.SimpleTTLCache())
+
+    with aioresponses() as gh:
+        gh.get('https://api.github.com/users/octocat', payload={
+            'login': 'octocat', 'name': 'The Octocat', 'followers': 7, 'public_repos': 2,
+        }, headers={'ETag': 'W/"user"'})
+        gh.get('https://api.github.com/users/octocat/repos?per_page=100', payload=[
+            {'name': 'hello', 'stargazers_count': 3, 'forks_count': 1, 'language': 'Go',
+             'pushed_at': '2020-01-01T00:00:00Z', 'owner': {'login': 'octocat'}},
+            {'name': 'infra', 'stargazers_count': 9, 'forks_count': 0, 'language': 'HCL',
+             'pushed_at': '2021-01-01T00:00:00Z', 'license': None},
+        ], headers={'ETag': 'W/"repos"'})
+
+        r = client.get('/api/profile/octocat')
+
+    assert r.status_code == 200
+    profile = r.json()['profile']
+    assert profile['username'] == 'octocat'
+    assert profile['followers'] == 7
+    assert profile['total_stars'] == 12
+    assert profile['languages'] == {'Go': 1, 'HCL': 1}
+    assert [repo['name'] for repo in profile['top_repos']] == ['infra', 'hello']
+
+
+def test_api_profile_missing_user_returns_404(client, monkeypatch):
+    from aioresponses import aioresponses
+
+    monkeypatch.setattr(application, 'GITHUB_TOKEN', None)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache())
+    monkeypatch.setattr(application, 'response_cache', application.SimpleTTLCache())
+
+    with aioresponses() as gh:
+        gh.get('https://api.github.com/users/ghost', status=404, payload={'message': 'Not Found'})
+        gh.get('https://api.github.com/users/ghost/repos?per_page=100', status=404, payload={'message': 'Not Found'})
+
+        r = client.get('/api/profile/ghost')
+
+    assert r.status_code == 404
+    assert r.json()['status'] == 404
+
+
+def test_redis_errors_degrade_to_cache_misses():
+    import redis.asyncio as redis
+
+    class DownRedis:
+        async def get(self, key):
+            raise redis.ConnectionError('Error 111 connecting to 127.0.0.1:1.')
+
+        async def set(self, key, value, ex=None):
+            raise redis.ConnectionError('Error 111 connecting to 127.0.0.1:1.')
+
+    cache = application.RedisTTLCache(DownRedis())
+
+    async def exercise():
+        await cache.set('profile:octocat', {'username': 'octocat'})
+        return await cache.get('profile:octocat'), await cache.get_stale('profile:octocat')
+
+    assert asyncio.run(exercise()) == (None, None)
+
+
+def test_follower_refetches_when_leader_is_cancelled(monkeypatch):
+    calls = []
+
+    async def fake_github_get(path, params=None, etag=None):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        if path.endswith('/repos'):
+            return [], None, False
+        return {'login': 'torvalds'}, None, False
+
+    monkeypatch.setattr(application, '_github_get', fake_github_get)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache())
+
+    async def scenario():
+        leader = asyncio.create_task(application.aggregate_github_profile('torvalds'))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(application.aggregate_github_profile('torvalds'))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    profile = asyncio.run(scenario())
+
+    assert profile['username'] == 'torvalds'
+    assert len(calls) == 4
+    assert application._inflight == {}
+
+
+def test_graphql_profile_resolves_organizations(monkeypatch):
+    async def fake_graphql(query, variables):
+        # Organizations only expose the RepositoryOwner and Organization fields
+        return {'repositoryOwner': {
+            'login': 'github', 'name': 'GitHub', 'description': 'How people build software.',
+            'avatarUrl': 'https://example.com/gh.png', 'url': 'https://github.com/github',
+            'repositories': {'totalCount': 1, 'nodes': [{
+                'name': 'linguist', 'url': 'https://github.com/github/linguist',
+                'stargazerCount': 12, 'forkCount': 4, 'primaryLanguage': {'name': 'Ruby'},
+                'pushedAt': '2024-01-01T00:00:00Z', 'updatedAt': '2024-01-01T00:00:00Z',
+            }]},
+        }}
+
+    monkeypatch.setattr(application, 'GITHUB_TOKEN', 'token')
+    monkeypatch.setattr(application, '_github_graphql', fake_graphql)
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache())
+
+    profile = asyncio.run(application.aggregate_github_profile('github'))
+
+    assert 'repositoryOwner(login: $login)' in application.PROFILE_QUERY
+    assert profile['username'] == 'github'
+    assert profile['bio'] == 'How people build software.'
+    assert profile['followers'] == 0
+    assert profile['total_stars'] == 12
+
+
+def test_invalid_usernames_are_rejected(client, monkeypatch):
+    async def fake_aggregate(username):
+        raise AssertionError('GitHub must not be called')
+
+    monkeypatch.setattr(application, 'aggregate_github_profile', fake_aggregate)
+
+    r = client.post('/api/profiles', json={'usernames': ['../orgs/github', 'octocat/repos', 'a?x=1']})
+    assert r.status_code == 400
+    assert r.json()['usernames'] == ['../orgs/github', 'octocat/repos', 'a?x=1']
+    assert client.post('/api/profiles', json={'usernames': ['a' * 40]}).status_code == 400
+    assert client.get('/api/profile/a%3Fx%3D1').status_code == 400
+    # A trailing newline must not slip past the anchor
+    assert client.post('/api/profiles', json={'usernames': ['torvalds\n']}).status_code == 400
+    assert client.get('/api/profile/torvalds%0A').status_code == 400
+
+
+def test_batch_profiles_reports_base_exceptions(client, monkeypatch):
+    async def fake_aggregate(username):
+        if username == 'gone':
+            raise asyncio.CancelledError()
+        return {'username': username}
+
+    monkeypatch.setattr(application, 'aggregate_github_profile', fake_aggregate)
+
+    r = client.post('/api/profiles', json={'usernames': ['octocat', 'gone']})
+    assert r.status_code == 200
+    assert r.json()['profiles'] == {'octocat': {'username': 'octocat'}}
+    assert r.json()['errors'] == {'gone': 500}
+
+
+def test_profile_body_expires_with_its_aggregate(client, monkeypatch):
+    calls = []
+
+    async def fake_aggregate(username):
+        calls.append(username)
+        # Shared aggregate that is already 59s into its 60s TTL
+        return {'username': username, 'fetched_at': time.time() - 59.5}
+
+    monkeypatch.setattr(application, 'aggregate_github_profile', fake_aggregate)
+    monkeypatch.setattr(application, 'response_cache', application.SimpleTTLCache(stale_seconds=0))
+    monkeypatch.setattr(application, 'cache', application.SimpleTTLCache(ttl_seconds=60))
+
+    assert client.get('/api/profile/octocat').status_code == 200
+    time.sleep(0.6)
+    assert client.get('/api/profile/octocat').status_code == 200
+    assert calls == ['octocat', 'octocat']